@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
+import functools
+import hashlib
 import json
 import os
 import platform
 import shutil
+import socket
 import subprocess
 import sys
 import time
-from importlib import metadata, resources
+from importlib import metadata, util
 from pathlib import Path
 from typing import Optional
 
 
+@functools.lru_cache(maxsize=None)
 def get_version() -> str:
     """Get the current package version."""
     try:
@@ -19,49 +23,107 @@ def get_version() -> str:
         return "dev"
 
 try:
-    import questionary
     from rich.console import Console
     from rich.panel import Panel
     from rich.prompt import Confirm, Prompt
     from rich.table import Table
     from rich.theme import Theme
+
+    # questionary pulls in prompt_toolkit, which is slow to import and only
+    # needed by the dashboard, so just check that it is installed here.
+    if util.find_spec("questionary") is None:
+        raise ImportError("questionary")
 except ImportError:
     print("Error: 'rich' and 'questionary' libraries are required.")
     sys.exit(1)
 
 
-def open_browser(url: str) -> None:
-    """Open a URL in the browser without printing messages."""
-    try:
-        if platform.system() == "Darwin":
-            subprocess.run(
-                ["open", url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-            )
-        elif platform.system() == "Windows":
-            subprocess.run(
-                ["start", url],
-                shell=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-        else:  # Linux
-            subprocess.run(
-                ["xdg-open", url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-            )
-    except (FileNotFoundError, OSError):
-        # Fallback if browser command is missing (common in WSL or headless servers)
-        # We use print because 'console' might not be fully initialized or accessible depending on scope,
-        # though it is global. Using print is safe.
-        print(f"\nUnable to open browser automatically. Please open: {url}")
+def open_browser(*urls: str) -> None:
+    """Open one or more URLs in the browser without printing messages.
+
+    The opener is not waited for, so several URLs can be opened back to back
+    without serializing on each launcher process. macOS 'open' takes all the
+    URLs in a single invocation; xdg-open only accepts one at a time.
+    """
+    if SYSTEM == "Darwin":
+        batches = [list(urls)]
+    else:
+        batches = [[url] for url in urls]
+
+    for batch in batches:
+        try:
+            if SYSTEM == "Windows":
+                # ShellExecute directly instead of spawning cmd.exe for 'start'
+                os.startfile(batch[0])
+            else:
+                subprocess.Popen(
+                    BROWSER_OPENER + batch,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+        except (FileNotFoundError, OSError):
+            # Fallback if browser command is missing (common in WSL or headless servers)
+            # We use print because 'console' might not be fully initialized or accessible depending on scope,
+            # though it is global. Using print is safe.
+            for url in batch:
+                print(f"\nUnable to open browser automatically. Please open: {url}")
 
 
 # --- Constants ---
 APP_NAME = "jupyagent"
+SYSTEM = platform.system()
+# URL opener for macOS and Linux; Windows uses os.startfile()
+BROWSER_OPENER = ["open"] if SYSTEM == "Darwin" else ["xdg-open"]
 CONFIG_DIR = Path.home() / f".{APP_NAME}"
 COMPOSE_FILE = CONFIG_DIR / "docker-compose.yml"
 ENV_FILE = CONFIG_DIR / ".env"
 CONFIG_JSON = CONFIG_DIR / "config.json"
+IMAGE_NAME = "jupyagent"
 DEFAULT_TOKEN = "jupyagent"
+DOCKER_PROBE_TTL = 24 * 60 * 60  # seconds
+DOCKER_PROBE_TIMEOUT = 5  # seconds
+SERVICE_STATE_TTL = 2  # seconds
+DOCKER_SOCKET = "/var/run/docker.sock"
+DOCKER_PIPE = r"\\.\pipe\docker_engine"
+
+# Files copied from the package into the Docker build context
+DOCKER_FILES = (
+    "Dockerfile",
+    "supervisord.conf",
+    "start.sh",
+    "opencode.json.template",
+    "register-kernel.sh",
+    "run-jupyter-mcp.sh",
+    "jupyter_settings.json",
+)
+
+# --- Templates ---
+ENV_TEMPLATE = """JUPYTER_TOKEN={jupyter_token}
+RO_PATH={ro_path}
+RW_PATH={rw_path}
+"""
+
+COMPOSE_TEMPLATE = """services:
+  jupyagent:
+    image: jupyagent
+    container_name: jupyagent
+    build: ./jupyter
+    ports:
+      - "8888:8888"  # Jupyter Lab
+      - "8282:8080"  # ttyd Web Terminal
+      - "3000:3000"  # Opencode UI
+      - "1455:1455"  # Opencode OAuth callback
+    environment:
+      - JUPYTER_TOKEN={jupyter_token}
+      - CLAUDE_CONFIG_DIR=/home/jovyan/.claude
+    volumes:
+      - {ro_path}:/mnt/ro_data:ro
+      - {rw_path}:/workspace:rw
+      - {agent_config_path}:/home/jovyan/.config/opencode:rw
+      - {agent_data_path}:/home/jovyan/.local/share/opencode:rw
+      - {claude_config_path}:/home/jovyan/.claude:rw
+"""
 
 # --- Styling ---
 custom_theme = Theme(
@@ -75,173 +137,372 @@ custom_theme = Theme(
 )
 console = Console(theme=custom_theme)
 
+# questionary style rules for the dashboard menu
+DASHBOARD_STYLE = [
+    ("qmark", "hidden"),
+    ("question", "bold"),
+    ("answer", "fg:#00d7ff bold"),
+    ("pointer", "fg:#00d7ff bold"),
+    ("highlighted", "fg:#00d7ff bold"),
+    ("selected", "fg:#00d7ff"),
+    ("separator", "fg:#555555"),
+    ("instruction", "fg:#555555"),
+    ("text", ""),
+    ("disabled", "fg:#555555"),
+]
+
+HELP_TEXT = """[bold]What is JupyAgent?[/bold]
+
+JupyAgent creates a secure, containerized environment for AI coding agents to work with Jupyter notebooks. It combines Jupyter Lab, AI agents (OpenCode & Claude Code), and development tools in a single Docker container.
+
+[bold]Key Components:[/bold]
+
+• [cyan]Jupyter Lab[/cyan] - Interactive notebook environment where agents can execute code
+• [cyan]OpenCode & Claude Code[/cyan] - AI coding agents that can write and run code
+• [cyan]Jupyter MCP Server[/cyan] - Model Context Protocol server that lets agents interact with Jupyter notebooks in real-time
+• [cyan]Web Terminal[/cyan] - Browser-based terminal for direct access to the container
+• [cyan]Dev Tools[/cyan] - git, vim, nano, build-essential, and more
+
+[bold]Path Configuration:[/bold]
+
+• [green]Read-Only Path[/green] - Directory the agents can read but not modify (e.g., your existing codebase or data). Mounted at [dim]/mnt/ro_data[/dim] inside the container.
+
+• [yellow]Read-Write Path[/yellow] - Directory where agents can create and modify files (e.g., your project workspace). Mounted at [dim]/workspace[/dim] inside the container.
+
+[bold]How It Works:[/bold]
+
+1. Both OpenCode and Claude Code connect to the Jupyter MCP server
+2. Agents can create notebooks, execute code, and see results in real-time
+3. All work happens in the isolated Docker container
+4. Your files in the read-write path are preserved between sessions
+
+[bold]Authentication:[/bold]
+
+• Jupyter Lab uses an auto-generated token (embedded in URLs)
+• Web terminal has no authentication (localhost only)
+• OpenCode and Claude Code use persistent authentication
+
+For more info: [link]https://github.com/sdiebolt/jupyagent[/link]"""
+HELP_PANEL = Panel(HELP_TEXT, border_style="cyan", padding=(1, 2))
+
 # --- Globals ---
 DOCKER_CMD = ["docker"]
+# Set once a 'docker info' probe has succeeded in this process
+DOCKER_DAEMON_OK = False
+# Parsed config.json keyed on (inode, mtime_ns, size) of the file it was read from
+_CONFIG_CACHE: dict = {"key": None, "data": None}
+# Contents of TOKEN.txt keyed on (path, mtime_ns, size) of the file
+_TOKEN_CACHE: dict = {"key": None, "token": None}
+# Last is_service_running() result and the time.monotonic() it was taken at
+_SERVICE_STATE: dict = {"checked_at": None, "running": False}
 
 # --- Logic & Helpers ---
 
 
-def detect_docker_command():
-    """Detects if we need to use 'sudo docker' or just 'docker'."""
-    global DOCKER_CMD
+def detect_docker_command(refresh: bool = False) -> str:
+    """Detects if we need to use 'sudo docker' or just 'docker'.
 
-    # Try standard docker
-    try:
-        subprocess.run(
-            ["docker", "info"],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        DOCKER_CMD = ["docker"]
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        pass
+    Returns "ok", "missing" (no Docker CLI) or the failed probe status. The
+    command is cached in config.json for DOCKER_PROBE_TTL seconds; pass
+    ``refresh=True`` to ignore the cached value and probe again.
+    """
+    global DOCKER_CMD, DOCKER_DAEMON_OK
 
-    # Try sudo docker
-    if platform.system() == "Linux":
-        try:
-            subprocess.run(
-                ["sudo", "docker", "info"],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
+    if not refresh:
+        config = load_config() or {}
+        cached_cmd = config.get("docker_cmd")
+        probed_at = config.get("docker_probed_at", 0)
+        if (
+            cached_cmd
+            and time.time() - probed_at < DOCKER_PROBE_TTL
+            # A PATH lookup is enough to notice the CLI has since gone away
+            and shutil.which("docker") is not None
+        ):
+            DOCKER_CMD = cached_cmd
+            return "ok"
+
+    # Try standard docker, then sudo docker only if the socket refused us
+    status = probe_docker(["docker"])
+    if status == "denied" and SYSTEM == "Linux":
+        if probe_docker(["sudo", "docker"]) == "ok":
             DOCKER_CMD = ["sudo", "docker"]
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
+            status = "ok"
+    elif status == "ok":
+        DOCKER_CMD = ["docker"]
+    if status != "ok":
+        return status
+
+    DOCKER_DAEMON_OK = True
+    cache_docker_command()
+    return "ok"
 
-    return False
 
+def probe_docker(cmd: list) -> str:
+    """Check that the daemon answers with a single 'docker info' call.
 
-def check_docker() -> bool:
+    Returns "ok", "missing" (CLI not found), "denied" (no permission on the
+    daemon socket) or "down" (any other failure, including a daemon that
+    does not answer within DOCKER_PROBE_TIMEOUT seconds).
+    """
     try:
-        # Check CLI presence
-        subprocess.run(
-            ["docker", "--version"],
-            check=True,
-            stdout=subprocess.PIPE,
+        # Plain 'docker info': with --format, some CLI versions still exit 0
+        # (or hide the connection error) when the daemon is unreachable
+        res = subprocess.run(
+            cmd + ["info"],
+            stdout=subprocess.DEVNULL,
+            # Kept as bytes: the CLI writes UTF-8, which the locale codec
+            # (e.g. cp1252 on Windows) may fail to decode
             stderr=subprocess.PIPE,
+            # sudo may be waiting for a password, so never cut it short
+            timeout=None if cmd[0] == "sudo" else DOCKER_PROBE_TIMEOUT,
         )
+    except FileNotFoundError:
+        return "missing"
+    except subprocess.TimeoutExpired:
+        return "down"
+    if res.returncode == 0:
+        return "ok"
+    if b"permission denied" in res.stderr.lower():
+        return "denied"
+    return "down"
+
+
+def cache_docker_command():
+    """Persist the detected docker command so later launches skip the probe."""
+    config = load_config()
+    # Never create config.json here: its presence marks setup as done
+    if not config:
+        return
+    # Caching is only an optimization: never fail startup over it (read-only
+    # or root-owned config dir after a 'sudo jupyagent' run, ...)
+    try:
+        save_config(
+            {**config, "docker_cmd": DOCKER_CMD, "docker_probed_at": int(time.time())}
+        )
+    except OSError:
+        pass
+
+
+def docker_context() -> str:
+    """Return the name of the Docker CLI context currently selected."""
+    context = os.environ.get("DOCKER_CONTEXT")
+    if context:
+        return context
+    docker_config = Path(os.environ.get("DOCKER_CONFIG") or Path.home() / ".docker")
+    try:
+        cli_config = json.loads((docker_config / "config.json").read_bytes())
+    except FileNotFoundError:
+        return "default"
+    except (OSError, ValueError):
+        # Unreadable CLI config: the selected context is unknown
+        return ""
+    if not isinstance(cli_config, dict):
+        return ""
+    return cli_config.get("currentContext") or "default"
+
+
+def docker_socket_reachable() -> bool:
+    """Cheaply check that the default local Docker endpoint accepts connections.
+
+    Only used as a fast path: a False result means "unknown", not "down".
+    """
+    if os.environ.get("DOCKER_HOST") or DOCKER_CMD != ["docker"]:
+        return False
+    if docker_context() != "default":
+        # The CLI targets another endpoint (Desktop, rootless, remote, ...)
+        return False
+    if SYSTEM == "Windows":
+        return os.path.exists(DOCKER_PIPE)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(0.1)
+    try:
+        sock.connect(DOCKER_SOCKET)
         return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    except OSError:
         return False
+    finally:
+        sock.close()
 
 
 def check_docker_running() -> bool:
-    # Use the detected command
+    # detect_docker_command() just ran 'docker info' successfully
+    if DOCKER_DAEMON_OK or docker_socket_reachable():
+        return True
+
+    # Fall back to the detected command (sudo, DOCKER_HOST, contexts, ...)
     try:
         subprocess.run(
             DOCKER_CMD + ["info"],
             check=True,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
+            timeout=None if DOCKER_CMD[0] == "sudo" else DOCKER_PROBE_TIMEOUT,
         )
         return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    except (
+        subprocess.CalledProcessError,
+        subprocess.TimeoutExpired,
+        FileNotFoundError,
+    ):
         return False
 
 
 def load_config() -> Optional[dict]:
-    if CONFIG_JSON.exists():
-        try:
-            with open(CONFIG_JSON, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return None
-    return None
+    """Load config.json, reusing the parsed dict while the file is unchanged."""
+    try:
+        st = CONFIG_JSON.stat()
+    except FileNotFoundError:
+        return None
+
+    # The file is replaced on every save, so the inode tells rewrites apart
+    # even where mtime is too coarse (HFS+, FAT, some network mounts)
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if _CONFIG_CACHE["key"] == key:
+        return _CONFIG_CACHE["data"]
+
+    try:
+        data = json.loads(CONFIG_JSON.read_bytes())
+    except json.JSONDecodeError:
+        data = None
+    _CONFIG_CACHE["key"] = key
+    _CONFIG_CACHE["data"] = data
+    return data
+
+
+def ensure_dir(path: Path) -> None:
+    """Create a directory (and parents) unless it already exists."""
+    # A failed mkdir(exist_ok=True) still stats the path afterwards, so
+    # checking first is cheaper on the common already-exists path.
+    if not path.is_dir():
+        path.mkdir(parents=True, exist_ok=True)
 
 
 def save_config(config: dict):
-    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CONFIG_JSON, "w") as f:
-        json.dump(config, f, indent=2)
+    ensure_dir(CONFIG_DIR)
+    # json.dump() issues one write() per encoded chunk; serialize first instead
+    write_files([(CONFIG_JSON, json.dumps(config, indent=2))])
+    _CONFIG_CACHE["key"] = None
 
 
+@functools.lru_cache(maxsize=None)
+def get_docker_package():
+    """Locate the packaged docker directory (resolved once per process)."""
+    # Only needed when (re)generating the build context, so keep it off the
+    # startup path.
+    from importlib import resources
+
+    return resources.files("jupyagent.docker")
+
+
+@functools.lru_cache(maxsize=None)
 def get_docker_file_content(filename: str) -> str:
-    """Read a docker config file from the package."""
+    """Read a docker config file from the package (once per process)."""
     try:
-        return resources.files("jupyagent.docker").joinpath(filename).read_text()
+        return get_docker_package().joinpath(filename).read_text()
     except Exception:
         # Fallback for development: read from source directory
         docker_dir = Path(__file__).parent / "docker"
         return (docker_dir / filename).read_text()
 
 
-def generate_docker_files(config: dict):
-    """Generate Docker configuration files for JupyAgent."""
-    # Create jupyter directory for Docker build context
+def build_context_hash() -> str:
+    """Hash the generated Docker build context the image is built from."""
     jupyter_dir = CONFIG_DIR / "jupyter"
-    jupyter_dir.mkdir(exist_ok=True)
+    h = hashlib.sha256()
+    for name in sorted(DOCKER_FILES):
+        h.update(name.encode())
+        h.update((jupyter_dir / name).read_bytes())
+    return h.hexdigest()
 
-    # Copy all docker files from package to build context
-    docker_files = [
-        "Dockerfile",
-        "supervisord.conf",
-        "start.sh",
-        "opencode.json.template",
-        "register-kernel.sh",
-        "run-jupyter-mcp.sh",
-        "jupyter_settings.json",
-    ]
 
-    for filename in docker_files:
-        content = get_docker_file_content(filename)
-        dest_path = jupyter_dir / filename
-        with open(dest_path, "w", newline="\n", encoding="utf-8") as f:
-            f.write(content)
-        # Make scripts executable
-        if filename.endswith(".sh"):
-            os.chmod(dest_path, 0o755)
+def image_exists() -> bool:
+    """Check whether the JupyAgent image has already been built."""
+    try:
+        res = subprocess.run(
+            DOCKER_CMD + ["image", "inspect", IMAGE_NAME],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return res.returncode == 0
+    except FileNotFoundError:
+        return False
+
+
+def write_files(files: list[tuple[Path, str]], mode: Optional[int] = None) -> None:
+    """Write each (path, content) pair in one call, UTF-8 with LF line endings.
+
+    Files whose content is unchanged are left untouched; others are replaced
+    atomically so an interrupted write never leaves a truncated file behind.
+    If ``mode`` is given, it is set on the open file before the replace and
+    unchanged files only get a chmod when their mode differs.
+    """
+    for path, content in files:
+        # os.replace() swaps a symlink itself; write through it to the target
+        path = path.resolve()
+        data = content.encode("utf-8")
+        try:
+            unchanged = path.read_bytes() == data
+        except FileNotFoundError:
+            unchanged = False
+        if unchanged:
+            if mode is not None and path.stat().st_mode & 0o777 != mode:
+                os.chmod(path, mode)
+            continue
+
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(tmp_path, flags, 0o666 if mode is None else mode)
+        try:
+            # The open() mode is masked by umask and ignored for a stale .tmp
+            if mode is not None and hasattr(os, "fchmod"):
+                os.fchmod(fd, mode)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            # Don't leave a half-written .tmp behind (e.g. in the build context)
+            tmp_path.unlink(missing_ok=True)
+            raise
+
 
-    # Create opencode directories for persistent storage
+def generate_docker_files(config: dict):
+    """Generate Docker configuration files for JupyAgent."""
+    # Docker build context
+    jupyter_dir = CONFIG_DIR / "jupyter"
+    # Opencode persistent storage
     opencode_config_dir = CONFIG_DIR / "opencode_config"
     opencode_data_dir = CONFIG_DIR / "opencode_data"
-    opencode_config_dir.mkdir(exist_ok=True)
-    opencode_data_dir.mkdir(exist_ok=True)
-
-    # Create claude directory for persistent storage (~/.claude/.credentials.json)
+    # Claude persistent storage (~/.claude/.credentials.json)
     claude_config_dir = CONFIG_DIR / "claude_config"
-    claude_config_dir.mkdir(exist_ok=True)
-
-    # Get configuration values
-    ro_path = config["ro_path"]
-    rw_path = config["rw_path"]
-    jupyter_token = config.get("jupyter_token", DEFAULT_TOKEN)
-    agent_config_path = str(opencode_config_dir.resolve())
-    agent_data_path = str(opencode_data_dir.resolve())
-    claude_config_path = str(claude_config_dir.resolve())
-
-    # .env file
-    with open(ENV_FILE, "w", newline="\n", encoding="utf-8") as f:
-        f.write(f"JUPYTER_TOKEN={jupyter_token}\n")
-        f.write(f"RO_PATH={ro_path}\n")
-        f.write(f"RW_PATH={rw_path}\n")
-
-    # docker-compose.yml
-    compose_content = f"""services:
-  jupyagent:
-    image: jupyagent
-    container_name: jupyagent
-    build: ./jupyter
-    ports:
-      - "8888:8888"  # Jupyter Lab
-      - "8282:8080"  # ttyd Web Terminal
-      - "3000:3000"  # Opencode UI
-      - "1455:1455"  # Opencode OAuth callback
-    environment:
-      - JUPYTER_TOKEN={jupyter_token}
-      - CLAUDE_CONFIG_DIR=/home/jovyan/.claude
-    volumes:
-      - {ro_path}:/mnt/ro_data:ro
-      - {rw_path}:/workspace:rw
-      - {agent_config_path}:/home/jovyan/.config/opencode:rw
-      - {agent_data_path}:/home/jovyan/.local/share/opencode:rw
-      - {claude_config_path}:/home/jovyan/.claude:rw
-"""
-    with open(COMPOSE_FILE, "w", newline="\n", encoding="utf-8") as f:
-        f.write(compose_content)
+
+    for directory in (
+        jupyter_dir,
+        opencode_config_dir,
+        opencode_data_dir,
+        claude_config_dir,
+    ):
+        ensure_dir(directory)
+
+    # Copy all docker files from package to build context
+    context_files = [
+        (jupyter_dir / name, get_docker_file_content(name)) for name in DOCKER_FILES
+    ]
+    write_files([f for f in context_files if f[0].suffix != ".sh"])
+    # Scripts are created executable
+    write_files([f for f in context_files if f[0].suffix == ".sh"], mode=0o755)
+
+    # Values substituted into ENV_TEMPLATE and COMPOSE_TEMPLATE
+    values = {
+        "ro_path": config["ro_path"],
+        "rw_path": config["rw_path"],
+        "jupyter_token": config.get("jupyter_token", DEFAULT_TOKEN),
+        "agent_config_path": str(opencode_config_dir.resolve()),
+        "agent_data_path": str(opencode_data_dir.resolve()),
+        "claude_config_path": str(claude_config_dir.resolve()),
+    }
+    env_content = ENV_TEMPLATE.format_map(values)
+    compose_content = COMPOSE_TEMPLATE.format_map(values)
+    write_files([(ENV_FILE, env_content), (COMPOSE_FILE, compose_content)])
 
 
 def cmd_open_web_terminal() -> str:
@@ -251,21 +512,93 @@ def cmd_open_web_terminal() -> str:
     return f"[info]Opened Web Terminal at {url}[/info]"
 
 
+def run_compose(*args: str, **kwargs) -> subprocess.CompletedProcess:
+    """Run a docker compose subcommand against the generated project."""
+    return subprocess.run(
+        DOCKER_CMD
+        + [
+            "compose",
+            "--project-directory",
+            str(CONFIG_DIR),
+            "-f",
+            str(COMPOSE_FILE),
+            *args,
+        ],
+        **kwargs,
+    )
+
+
 def is_service_running() -> bool:
-    if not COMPOSE_FILE.exists():
-        return False
+    now = time.monotonic()
+    checked_at = _SERVICE_STATE["checked_at"]
+    if checked_at is not None and now - checked_at < SERVICE_STATE_TTL:
+        return _SERVICE_STATE["running"]
+
+    running = False
+    if COMPOSE_FILE.exists():
+        try:
+            # One container ID per line, empty when nothing is running
+            res = run_compose(
+                "ps",
+                "-q",
+                "--status",
+                "running",
+                "jupyagent",
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            running = bool(res.stdout.strip())
+        except Exception:
+            running = False
+
+    _SERVICE_STATE["checked_at"] = now
+    _SERVICE_STATE["running"] = running
+    return running
+
+
+def invalidate_service_state():
+    """Force the next is_service_running() call to query Docker."""
+    _SERVICE_STATE["checked_at"] = None
+
+
+def read_token(token_file: Path) -> Optional[str]:
+    """Read the service token, reusing the last read while the file is unchanged."""
     try:
-        res = subprocess.run(
-            DOCKER_CMD + ["compose", "-f", str(COMPOSE_FILE), "ps", "--format", "json"],
-            cwd=CONFIG_DIR,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-        # Check for running container
-        return "jupyagent" in res.stdout and "running" in res.stdout.lower()
-    except Exception:
-        return False
+        st = token_file.stat()
+    except OSError:
+        return None
+
+    key = (token_file, st.st_mtime_ns, st.st_size)
+    if _TOKEN_CACHE["key"] == key:
+        return _TOKEN_CACHE["token"]
+
+    try:
+        token = token_file.read_bytes().decode().strip() or None
+    except (OSError, UnicodeDecodeError):
+        return None
+    _TOKEN_CACHE["key"] = key
+    _TOKEN_CACHE["token"] = token
+    return token
+
+
+def wait_for_token(
+    token_file: Path, timeout: float = 30, interval: float = 0.2
+) -> Optional[str]:
+    """Wait for the container to write a non-empty token file.
+
+    The file lives on a bind mount, where inotify/kqueue events are not
+    delivered reliably on Docker Desktop, so this polls with a short
+    interval instead.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        token = read_token(token_file)
+        if token:
+            return token
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(interval)
 
 
 # --- Commands ---
@@ -283,40 +616,7 @@ def show_help():
     )
     console.print()
 
-    help_text = """[bold]What is JupyAgent?[/bold]
-
-JupyAgent creates a secure, containerized environment for AI coding agents to work with Jupyter notebooks. It combines Jupyter Lab, AI agents (OpenCode & Claude Code), and development tools in a single Docker container.
-
-[bold]Key Components:[/bold]
-
-• [cyan]Jupyter Lab[/cyan] - Interactive notebook environment where agents can execute code
-• [cyan]OpenCode & Claude Code[/cyan] - AI coding agents that can write and run code
-• [cyan]Jupyter MCP Server[/cyan] - Model Context Protocol server that lets agents interact with Jupyter notebooks in real-time
-• [cyan]Web Terminal[/cyan] - Browser-based terminal for direct access to the container
-• [cyan]Dev Tools[/cyan] - git, vim, nano, build-essential, and more
-
-[bold]Path Configuration:[/bold]
-
-• [green]Read-Only Path[/green] - Directory the agents can read but not modify (e.g., your existing codebase or data). Mounted at [dim]/mnt/ro_data[/dim] inside the container.
-
-• [yellow]Read-Write Path[/yellow] - Directory where agents can create and modify files (e.g., your project workspace). Mounted at [dim]/workspace[/dim] inside the container.
-
-[bold]How It Works:[/bold]
-
-1. Both OpenCode and Claude Code connect to the Jupyter MCP server
-2. Agents can create notebooks, execute code, and see results in real-time
-3. All work happens in the isolated Docker container
-4. Your files in the read-write path are preserved between sessions
-
-[bold]Authentication:[/bold]
-
-• Jupyter Lab uses an auto-generated token (embedded in URLs)
-• Web terminal has no authentication (localhost only)
-• OpenCode and Claude Code use persistent authentication
-
-For more info: [link]https://github.com/sdiebolt/jupyagent[/link]"""
-
-    console.print(Panel(help_text, border_style="cyan", padding=(1, 2)))
+    console.print(HELP_PANEL)
     console.print()
     Prompt.ask("[dim]Press Enter to continue[/dim]", default="")
 
@@ -371,6 +671,13 @@ def cmd_setup():
         console.print("[error]Aborted.[/error]")
         sys.exit(0)
 
+    # Keep the docker command cache so the next launch skips the probe; a
+    # command not cached yet was just verified by run()
+    if existing_config and existing_config.get("docker_cmd") == DOCKER_CMD:
+        probed_at = existing_config.get("docker_probed_at", 0)
+    else:
+        probed_at = int(time.time())
+
     # Processing
     config = {
         "version": get_version(),
@@ -378,36 +685,29 @@ def cmd_setup():
         "ro_path": str(Path(ro_path).resolve()),
         "rw_path": str(Path(rw_path).resolve()),
         "jupyter_token": DEFAULT_TOKEN,
+        "docker_cmd": DOCKER_CMD,
+        "docker_probed_at": probed_at,
     }
 
     try:
-        Path(config["rw_path"]).mkdir(parents=True, exist_ok=True)
+        ensure_dir(Path(config["rw_path"]))
         save_config(config)
         generate_docker_files(config)
 
-        # Load .env to pass to subprocess
-        env = os.environ.copy()
-        with open(ENV_FILE, "r") as f:
-            for line in f:
-                if "=" in line:
-                    key, value = line.strip().split("=", 1)
-                    env[key] = value
-
-        console.print("\n[highlight]Building Docker environment...[/highlight]")
-        subprocess.run(
-            DOCKER_CMD
-            + [
-                "compose",
+        # Only the build context feeds the image; path changes need no rebuild
+        build_hash = build_context_hash()
+        previous_hash = existing_config.get("build_hash") if existing_config else None
+        if build_hash == previous_hash and image_exists():
+            console.print("\n[info]Docker image is up to date, skipping build.[/info]")
+        else:
+            console.print("\n[highlight]Building Docker environment...[/highlight]")
+            run_compose(
                 "--env-file",
                 str(ENV_FILE),
-                "-f",
-                str(COMPOSE_FILE),
                 "build",
-            ],
-            cwd=CONFIG_DIR,
-            env=env,
-            check=True,
-        )
+                check=True,
+            )
+        save_config({**config, "build_hash": build_hash})
         console.print("[success]Setup Complete![/success]")
     except Exception as e:
         console.print(f"[error]Setup Failed:[/error] {e}")
@@ -420,15 +720,6 @@ def cmd_start() -> str:
         cmd_setup()
 
     try:
-        # Load .env manually to pass to subprocess
-        env = os.environ.copy()
-        if ENV_FILE.exists():
-            with open(ENV_FILE, "r") as f:
-                for line in f:
-                    if "=" in line:
-                        key, value = line.strip().split("=", 1)
-                        env[key] = value
-
         # Clean up stale token file before starting
         config = load_config() or {}
         rw_path = config.get("rw_path")
@@ -441,70 +732,48 @@ def cmd_start() -> str:
         with console.status(
             "[highlight]Starting services (Jupyter + ttyd + Opencode)...[/highlight]"
         ):
-            subprocess.run(
-                DOCKER_CMD
-                + [
-                    "compose",
-                    "--env-file",
-                    str(ENV_FILE),
-                    "-f",
-                    str(COMPOSE_FILE),
-                    "up",
-                    "-d",
-                ],
-                cwd=CONFIG_DIR,
-                env=env,
+            run_compose(
+                "--env-file",
+                str(ENV_FILE),
+                "up",
+                "-d",
                 check=True,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
             )
 
             # Wait for token file to be created to ensure all services are started.
-            token = None
-            if token_file:
-                for _ in range(30):
-                    if token_file.exists():
-                        content = token_file.read_text().strip()
-                        if content:
-                            token = content
-                            break
-                    time.sleep(1)
+            token = wait_for_token(token_file) if token_file else None
 
         # Open browsers after spinner is done
         if token:
             console.print("[info]Opening web interfaces...[/info]")
-            open_browser(f"http://localhost:8888/lab?token={token}")
-            open_browser("http://localhost:8282")
-            open_browser("http://localhost:3000")
+            open_browser(
+                f"http://localhost:8888/lab?token={token}",
+                "http://localhost:8282",
+                "http://localhost:3000",
+            )
 
         return "[success]Services started successfully.[/success]"
     except subprocess.CalledProcessError:
         return "[error]Failed to start services.[/error]"
+    finally:
+        invalidate_service_state()
 
 
 def cmd_launch_agent() -> str:
     console.print("[highlight]Opening Agent Web Interface...[/highlight]")
     console.print("[info]Once running, open: http://localhost:3000[/info]")
-    try:
-        open_browser("http://localhost:3000")
-        return "[success]Opened web browser.[/success]"
-    except subprocess.CalledProcessError:
-        return "[error]Failed to start Agent service.[/error]"
+    open_browser("http://localhost:3000")
+    return "[success]Opened web browser.[/success]"
 
 
 def cmd_open_jupyter() -> str:
     config = load_config()
     if config:
-        # Read token from file (generated by Zellij at container startup)
+        # Read token from file (written by start.sh once services are up)
         token_file = Path(config.get("rw_path", ".")) / "TOKEN.txt"
-        token = DEFAULT_TOKEN
-        if token_file.exists():
-            try:
-                content = token_file.read_text().strip()
-                if content:
-                    token = content
-            except Exception:
-                pass
+        token = read_token(token_file) or DEFAULT_TOKEN
         url = f"http://localhost:8888/lab?token={token}"
         console.print(f"Opening Jupyter: [link]{url}[/link]")
         open_browser(url)
@@ -516,17 +785,36 @@ def cmd_stop() -> str:
     if not CONFIG_JSON.exists():
         return "[warning]Not set up.[/warning]"
     with console.status("[warning]Stopping services...[/warning]"):
-        subprocess.run(
-            DOCKER_CMD + ["compose", "-f", str(COMPOSE_FILE), "down"],
-            cwd=CONFIG_DIR,
+        run_compose(
+            "down",
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
+    invalidate_service_state()
     return "[success]Services stopped.[/success]"
 
 
 def cmd_dashboard(msg=""):
     """Simple Menu-based Dashboard"""
+    import questionary
+
+    # Static parts of the menu, built once per dashboard session
+    style = questionary.Style(DASHBOARD_STYLE)
+    menu_choices = [
+        questionary.Separator("─" * 30),
+        questionary.Choice("📓 Open Jupyter Lab", value="jupyter"),
+        questionary.Choice("💻 Open Web Terminal", value="terminal"),
+        questionary.Choice("🤖 Open Opencode", value="opencode"),
+        questionary.Separator("─" * 30),
+        questionary.Choice("⚙️ Re-configure", value="config"),
+        questionary.Choice("ℹ️  Help", value="help"),
+        questionary.Choice("❌ Exit", value="exit"),
+    ]
+
+    # Only re-configuring can move the workspace, so resolve it once up front
+    config = load_config() or {}
+    token_file = Path(config.get("rw_path", ".")) / "TOKEN.txt"
+
     while True:
         running = is_service_running()
         status = (
@@ -550,17 +838,7 @@ def cmd_dashboard(msg=""):
             msg = ""
 
         if running:
-            config = load_config() or {}
-            token_file = Path(config.get("rw_path", ".")) / "TOKEN.txt"
-            token = None
-
-            if token_file.exists():
-                try:
-                    content = token_file.read_text().strip()
-                    if content:
-                        token = content
-                except Exception:
-                    pass
+            token = read_token(token_file)
 
             table = Table(show_header=False, box=None, padding=(0, 2))
             table.add_column("Service", style="bold")
@@ -599,35 +877,10 @@ def cmd_dashboard(msg=""):
             else questionary.Choice("▶️ Start Services", value="toggle")
         )
 
-        choices = [
-            toggle_option,
-            questionary.Separator("─" * 30),
-            questionary.Choice("📓 Open Jupyter Lab", value="jupyter"),
-            questionary.Choice("💻 Open Web Terminal", value="terminal"),
-            questionary.Choice("🤖 Open Opencode", value="opencode"),
-            questionary.Separator("─" * 30),
-            questionary.Choice("⚙️ Re-configure", value="config"),
-            questionary.Choice("ℹ️  Help", value="help"),
-            questionary.Choice("❌ Exit", value="exit"),
-        ]
-
         choice = questionary.select(
             "",
-            choices=choices,
-            style=questionary.Style(
-                [
-                    ("qmark", "hidden"),
-                    ("question", "bold"),
-                    ("answer", "fg:#00d7ff bold"),
-                    ("pointer", "fg:#00d7ff bold"),
-                    ("highlighted", "fg:#00d7ff bold"),
-                    ("selected", "fg:#00d7ff"),
-                    ("separator", "fg:#555555"),
-                    ("instruction", "fg:#555555"),
-                    ("text", ""),
-                    ("disabled", "fg:#555555"),
-                ]
-            ),
+            choices=[toggle_option, *menu_choices],
+            style=style,
             instruction="(↑/↓ to move, Enter to select)",
         ).ask()
 
@@ -644,6 +897,8 @@ def cmd_dashboard(msg=""):
             msg = cmd_launch_agent()
         elif choice == "config":
             cmd_setup()
+            config = load_config() or {}
+            token_file = Path(config.get("rw_path", ".")) / "TOKEN.txt"
             msg = "[success]Configuration updated.[/success]"
         elif choice == "help":
             show_help()
@@ -657,18 +912,22 @@ def cmd_dashboard(msg=""):
 
 def run():
     # 1. Prerequisite Checks
-    detect_docker_command()
-    if not check_docker():
+    status = detect_docker_command()
+    # A stale cached command (e.g. the user was since removed from the docker
+    # group) is re-probed once before giving up
+    if status == "ok" and not check_docker_running():
+        status = detect_docker_command(refresh=True)
+
+    if status == "missing":
         console.print(
             "[error]Error: Docker CLI not found.[/error] Please install Docker."
         )
         sys.exit(1)
-
-    if not check_docker_running():
+    if status != "ok":
         console.print("[error]Error: Docker Daemon is not running.[/error]")
-        if platform.system() == "Linux":
+        if SYSTEM == "Linux":
             console.print("[info]Try running: sudo systemctl start docker[/info]")
-        elif platform.system() == "Darwin":
+        elif SYSTEM == "Darwin":
             console.print("[info]Please open Docker Desktop.[/info]")
         sys.exit(1)
 